@@ -1,5 +1,8 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+import itertools
+from dataclasses import dataclass
+
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 
@@ -8,83 +11,208 @@ app = FastAPI() # an instance of the FastAPI application is created
 # field validators: https://realpython.com/python-pydantic/#validating-models-and-fields
 # Pydantic modells
 class Course(BaseModel):
-    id: int
+    model_config = ConfigDict(frozen=True) # validated request data can not be changed by accident
+    id: int | None = None # if no id is sent, the server assigns the next free one
     name: str = Field(min_length=1, max_length=100)
     instructor: str = Field(min_length=3)
 
 class Participant(BaseModel):
-    id: int
+    model_config = ConfigDict(frozen=True)
+    id: int | None = None
     name: str = Field(min_length=3)
     course_id: int
 
-courses: list[Course] = []
-participants: list[Participant] = []
+# the Pydantic models above validate the request data, the stored data uses these lighter classes:
+# with slots=True an object has no __dict__ and needs clearly less memory than a Pydantic model, which adds up as the service never forgets data
+@dataclass(slots=True, frozen=True)
+class CourseRow:
+    id: int
+    name: str
+    instructor: str
+
+@dataclass(slots=True, frozen=True)
+class ParticipantRow:
+    id: int
+    name: str
+    course_id: int
+
+# the in-memory storage is keyed by id, so checking for duplicates is a single hash lookup instead of a scan over all entries
+# all endpoints are 'async def' and run on the event loop without any 'await', so a request can not be interrupted by another one
+# between checking the data (e.g. for a duplicated id) and changing it. Keep it that way: an 'await' or a plain 'def' endpoint
+# (which FastAPI runs in a thread) would make these check-then-change steps race with each other
+courses: dict[int, CourseRow] = {}
+participants: dict[int, ParticipantRow] = {}
+course_names: set[str] = set() # names of all stored courses, used to prevent duplicate course names
+participants_by_course: dict[int, dict[int, ParticipantRow]] = {} # course_id -> {participant_id: participant}, so filtering by course does not scan all participants
+
+# counters for the ids that the server assigns
+course_id_seq = itertools.count(1)
+participant_id_seq = itertools.count(1)
+
+def next_free_id(id_seq: itertools.count, storage: dict, reserved: set[int]) -> int:
+    """
+    Returns the next id of the counter that is not used in storage yet and not reserved.
+    - ids that clients have chosen themselves are skipped, so an assigned id never collides with a stored one
+    - reserved holds the ids chosen in the same request that are not stored yet
+    - the counter only moves forward, so over all calls every id is looked at once at most
+    """
+    new_id = next(id_seq)
+    while new_id in storage or new_id in reserved:
+        new_id = next(id_seq)
+    return new_id
+
+# the error responses never change, so the exceptions are created once here instead of on every failing request.
+# they are raised with .with_traceback(None): raising the same exception object again would otherwise add the new
+# traceback to the old one every time and keep all of them in memory
+COURSE_ID_EXISTS = HTTPException(status_code=400, detail="Course ID already exists.")
+COURSE_NAME_EXISTS = HTTPException(status_code=400, detail="Course name already exists.")
+COURSE_NOT_FOUND = HTTPException(status_code=404, detail="Course not found.")
+COURSE_NOT_FOUND_FOR_DELETE = HTTPException(status_code=404, detail="Course not found - there is nothing to delete.")
+PARTICIPANT_ID_EXISTS = HTTPException(status_code=400, detail="Participant ID already exists.")
+
+# the stored objects are already validated, so the endpoints serialize them directly and return the Response themselves.
+# FastAPI then skips the extra validation and conversion of response_model, which is only kept for the documentation at /docs
+def json_response(body: bytes | str) -> Response:
+    return Response(body, media_type="application/json")
+
+# the serializers are built once here instead of on every request,
+# dump_json() encodes the objects in pydantic-core (no conversion to a dict per object)
+course_adapter = TypeAdapter(CourseRow)
+course_list_adapter = TypeAdapter(list[CourseRow])
+participant_adapter = TypeAdapter(ParticipantRow)
+participant_list_adapter = TypeAdapter(list[ParticipantRow])
+
+# the serialized GET responses are cached and only recomputed after the data has changed
+json_cache: dict[str, bytes] = {} # "courses" -> GET /courses, "participants" -> GET /participants
+participants_by_course_json: dict[int, bytes] = {} # course_id -> GET /participants?course_id=...
 
 @app.get("/courses", response_model=list[Course]) # this indicates a HTTP GET endpoint, 
                                                        # if http://127.0.0.1:8000/courses is called, this function is executed
-def get_courses() -> list[Course]:
-    return courses
+async def get_courses() -> Response:
+    body = json_cache.get("courses")
+    if body is None:
+        body = json_cache["courses"] = course_list_adapter.dump_json(list(courses.values()))
+    return json_response(body)
 
 @app.post("/courses", response_model=Course) # defines an HTTP POST endpoint at /courses.
-def add_course(course: Course) -> Course:
-    # check duplicated ids
-    if any(c.id == course.id for c in courses):
-        raise HTTPException(status_code=400, detail="Course ID already exists.")
-    courses.append(course)
-    return course
+async def add_course(course: Course) -> Response:
+    row = store_courses([course])[0]
+    return json_response(course_adapter.dump_json(row))
+
+@app.post("/courses/bulk", response_model=list[Course]) # adds several courses with one request, the list is validated at once
+async def add_courses_bulk(new_courses: list[Course]) -> Response:
+    rows = store_courses(new_courses)
+    return json_response(course_list_adapter.dump_json(rows))
 
 @app.delete("/courses/{course_id}") # this function is called when the client sends an HTTP DELETE request to the endpoint /courses/{course_id}
                                          # course_id is the function parameter,
                                          # course.id is the field of a single course object in the courses list (the 'id' field)
-def delete_course(course_id: int):
-    if not any(c.id == course_id for c in courses):
-        raise HTTPException(status_code=404, detail="Course not found - there is nothing to delete.") # if no course with the id is found (the course doen not exist)
-    for course in courses:
-        if course.id == course_id: # if the course is found (the course's id (course.id) and the course_id that is searched for match)...
-            courses.remove(course) # it is removed
-            # break
-            updated_participants = delete_participants_by_course(course_id) # delete_participants_by_course returns a new temporary participant-list
-            participants.clear() # the original is cleared in order to...
-            participants.extend(updated_participants) # receive the new list
+async def delete_course(course_id: int):
+    course = courses.pop(course_id, None) # the course is removed, the lookup and the removal are one step
+    if course is None:
+        raise COURSE_NOT_FOUND_FOR_DELETE.with_traceback(None) # if no course with the id is found (the course doen not exist)
+    course_names.discard(course.name) # its name can be used again
+    delete_participants_by_course(course_id) # the participants of the course are removed as well
+    json_cache.clear() # both the courses and the participants have changed
 
 
 @app.get("/participants", response_model=list[Participant])
-def get_participants(course_id: int | None = None) -> list[Participant]: # course-id is an optional parameter, it can be an int, it can be None (not set at all)
+async def get_participants(course_id: int | None = None) -> Response: # course-id is an optional parameter, it can be an int, it can be None (not set at all)
     if course_id is not None:
-        if not any(c.id == course_id for c in courses):
-            raise HTTPException(status_code=404, detail="Course not found.") # if you try to get a list with a course that does not exist? 
-        filtered_list: list[Participant] = []
-        for participant in participants:
-            if participant.course_id == course_id:
-                filtered_list.append(participant)
-        return filtered_list
+        if course_id not in courses:
+            raise COURSE_NOT_FOUND.with_traceback(None) # if you try to get a list with a course that does not exist? 
+        body = participants_by_course_json.get(course_id)
+        if body is None:
+            body = participants_by_course_json[course_id] = participant_list_adapter.dump_json(
+                list(participants_by_course.get(course_id, {}).values()))
     else:
-        return participants
+        body = json_cache.get("participants")
+        if body is None:
+            body = json_cache["participants"] = participant_list_adapter.dump_json(list(participants.values()))
+    return json_response(body)
 
 @app.post("/participants", response_model=Participant)
-def add_participant(participant: Participant) -> Participant:
-    # course must exist
-    if not any(c.id == participant.course_id for c in courses):
-        raise HTTPException(status_code=404, detail="Course not found.")
-    if any(p.id == participant.id for p in participants):
-        raise HTTPException(status_code=400, detail="Participant ID already exists.")
-    participants.append(participant)
-    return participant
-
-def delete_participants_by_course(course_id: int):
+async def add_participant(participant: Participant) -> Response:
+    row = store_participants([participant])[0]
+    return json_response(participant_adapter.dump_json(row))
+
+@app.post("/participants/bulk", response_model=list[Participant])
+async def add_participants_bulk(new_participants: list[Participant]) -> Response:
+    rows = store_participants(new_participants)
+    return json_response(participant_list_adapter.dump_json(rows))
+
+def store_courses(new_courses: list[Course]) -> list[CourseRow]:
+    """
+    Checks and stores new courses, used by POST /courses and POST /courses/bulk.
+    - input: the validated courses of the request
+    - output: the stored courses, including the ids that the server has assigned
+    - all courses are checked before the first one is stored, so a rejected request does not store a part of the list
     """
-    add doc string for function
-    - input
-    - output 
-    - what does the function do 
-    - formatting, best practises
+    new_ids: set[int] = set()
+    new_names: set[str] = set()
+    for course in new_courses:
+        # check duplicated ids (also within the request)
+        if course.id in courses or course.id in new_ids:
+            raise COURSE_ID_EXISTS.with_traceback(None)
+        # check duplicated names
+        if course.name in course_names or course.name in new_names:
+            raise COURSE_NAME_EXISTS.with_traceback(None)
+        if course.id is not None:
+            new_ids.add(course.id)
+        new_names.add(course.name)
+    rows: list[CourseRow] = []
+    for course in new_courses:
+        if course.id is None:
+            course_id = next_free_id(course_id_seq, courses, new_ids) # the id is unique by construction
+        else:
+            course_id = course.id
+        row = CourseRow(id=course_id, name=course.name, instructor=course.instructor)
+        courses[row.id] = row
+        course_names.add(row.name)
+        rows.append(row)
+    json_cache.pop("courses", None)
+    return rows
+
+def store_participants(new_participants: list[Participant]) -> list[ParticipantRow]:
     """
-    # you can do it without 'global participants' but with a local variable
-    temp_list: list[Participant] = []
-    for participant in participants:
-        if participant.course_id != course_id:
-            temp_list.append(participant)
-    return temp_list
+    Checks and stores new participants, used by POST /participants and POST /participants/bulk.
+    - input: the validated participants of the request
+    - output: the stored participants, including the ids that the server has assigned
+    - like store_courses, nothing is stored if one of the participants is rejected
+    """
+    new_ids: set[int] = set()
+    for participant in new_participants:
+        # course must exist
+        if participant.course_id not in courses:
+            raise COURSE_NOT_FOUND.with_traceback(None)
+        if participant.id in participants or participant.id in new_ids:
+            raise PARTICIPANT_ID_EXISTS.with_traceback(None)
+        if participant.id is not None:
+            new_ids.add(participant.id)
+    rows: list[ParticipantRow] = []
+    for participant in new_participants:
+        if participant.id is None:
+            participant_id = next_free_id(participant_id_seq, participants, new_ids)
+        else:
+            participant_id = participant.id
+        row = ParticipantRow(id=participant_id, name=participant.name, course_id=participant.course_id)
+        participants[row.id] = row
+        participants_by_course.setdefault(row.course_id, {})[row.id] = row
+        participants_by_course_json.pop(row.course_id, None)
+        rows.append(row)
+    json_cache.pop("participants", None)
+    return rows
+
+def delete_participants_by_course(course_id: int) -> None:
+    """
+    Removes all participants of the course with the given course_id.
+    - input: the id of the course whose participants are deleted
+    - output: nothing, the participants dict and the participants_by_course index are changed in place
+    - only the participants of this course are touched, the other participants are not looked at
+    """
+    for participant_id in participants_by_course.pop(course_id, {}):
+        participants.pop(participant_id, None)
+    participants_by_course_json.pop(course_id, None)
 
 
 """
@@ -109,4 +237,11 @@ EDITING-DOUCUMENTATION: this is how I edited the code:
 ## 1:
 1. I added a 404 HTTP status message that is executed when in DELETE course is passed a course_id that is not available. I have also edited and changed the solution with the 'found_value'.
 2. I edited the DELETE endpoint and the associated helper function so that a solution with 'global' is no longer necessary.
-"""
\ No newline at end of file
+"""
+
+if __name__ == "__main__": # python main.py starts the server without the development settings of 'uvicorn main:app --reload'
+    import uvicorn
+    # uvloop and httptools (from uvicorn[standard]) are faster than the default asyncio loop and HTTP parser,
+    # the access log is switched off because it costs a logging call per request.
+    # only one worker: the data is stored in memory, so every worker process would have its own courses and participants
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools", access_log=False, workers=1)